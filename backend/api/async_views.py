@@ -0,0 +1,86 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.response import Response
+
+from api import serializers, views
+from api.cache import get_tags
+
+
+def async_read_view(viewset, actions, action):
+    """Async-представление для GET-запросов к вьюсету.
+
+    Аутентификация, проверка прав и рендеринг выполняются средствами DRF,
+    а данные читаются через async ORM. Остальные методы передаются
+    синхронному вьюсету без изменений.
+    """
+    sync_view = sync_to_async(viewset.as_view(actions))
+
+    def decorator(handler):
+        @wraps(handler)
+        async def view_func(request, *args, **kwargs):
+            if request.method != 'GET':
+                return await sync_view(request, *args, **kwargs)
+            view = viewset(
+                action=action,
+                action_map=actions,
+                args=args,
+                kwargs=kwargs,
+                format_kwarg=None,
+            )
+            view.request = view.initialize_request(request, *args, **kwargs)
+            view.headers = view.default_response_headers
+            try:
+                await sync_to_async(view.initial)(
+                    view.request, *args, **kwargs
+                )
+                response = await handler(view, *args, **kwargs)
+            except APIException as error:
+                response = view.handle_exception(error)
+            response = view.finalize_response(
+                view.request, response, *args, **kwargs
+            )
+            return await sync_to_async(response.render)()
+
+        view_func.csrf_exempt = True
+        return view_func
+
+    return decorator
+
+
+@async_read_view(views.TagViewsSet, {'get': 'list', 'post': 'create'}, 'list')
+async def tag_list(view):
+    return views.tags_response(view.request, *await sync_to_async(get_tags)())
+
+
+@async_read_view(views.IngredientViewSet, {'get': 'list'}, 'list')
+async def ingredient_list(view):
+    if (
+        settings.INGREDIENT_SEARCH_IN_MEMORY
+        and 'name' in view.request.query_params
+    ):
+        ingredients = await sync_to_async(view.get_queryset)()
+    else:
+        ingredients = [
+            ingredient async for ingredient in view.get_queryset()
+        ]
+    return Response(
+        serializers.IngredientSerializer(ingredients, many=True).data
+    )
+
+
+@async_read_view(
+    views.RecipeViewSet,
+    {'get': 'retrieve', 'patch': 'partial_update', 'delete': 'destroy'},
+    'retrieve',
+)
+async def recipe_detail(view, pk):
+    recipe = await view.get_queryset().filter(pk=pk).afirst()
+    if recipe is None:
+        raise NotFound()
+    serializer = serializers.RecipeSerializer(
+        recipe, context=view.get_serializer_context()
+    )
+    return Response(await sync_to_async(lambda: serializer.data)())
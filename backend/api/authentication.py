@@ -0,0 +1,101 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.permissions import SAFE_METHODS
+
+TOKEN_CACHE_KEY = 'api:token:{}'
+
+
+class LRUCache:
+    """Ограниченный по размеру кеш процесса со сроком жизни записей."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+local_tokens = LRUCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL)
+
+
+def get_token_cache_key(key):
+    """Ключ кеша по хешу токена, чтобы сам токен не попадал в кеш."""
+    return TOKEN_CACHE_KEY.format(hashlib.sha256(key.encode()).hexdigest())
+
+
+def invalidate_token(key):
+    cache_key = get_token_cache_key(key)
+    local_tokens.delete(cache_key)
+    if settings.TOKEN_CACHE_SHARED:
+        cache.delete(cache_key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Аутентификация по токену с кешем пары токен-пользователь.
+
+    Пара хранится в LRU-кеше процесса не дольше TOKEN_CACHE_TTL секунд,
+    а при TOKEN_CACHE_SHARED еще и в общем кеше Django на
+    TOKEN_CACHE_SHARED_TTL секунд. Сигналы сбрасывают запись при удалении
+    токена и изменении пользователя. Другие процессы узнают об этом из
+    общего кеша после истечения своей локальной записи.
+
+    Кеш используется только для чтения: запросы, изменяющие данные,
+    получают пользователя из базы и обновляют запись в кеше, поэтому
+    представления никогда не сохраняют устаревшую копию пользователя.
+    """
+
+    use_cache = True
+
+    def authenticate(self, request):
+        self.use_cache = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_cached(self, cache_key):
+        cached = local_tokens.get(cache_key)
+        if cached is None and settings.TOKEN_CACHE_SHARED:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                local_tokens.set(cache_key, cached)
+        return cached
+
+    def authenticate_credentials(self, key):
+        cache_key = get_token_cache_key(key)
+        cached = self.get_cached(cache_key) if self.use_cache else None
+        if cached is None:
+            cached = super().authenticate_credentials(key)
+            local_tokens.set(cache_key, cached)
+            if settings.TOKEN_CACHE_SHARED:
+                cache.set(cache_key, cached, settings.TOKEN_CACHE_SHARED_TTL)
+        user, token = (copy.copy(obj) for obj in cached)
+        token.user = user
+        return user, token
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+
+from api.serializers import TagSerializer
+from recipes.models import Tag
+
+TAGS_CACHE_KEY = 'api:tags'
+TAG_IDS_CACHE_KEY = 'api:tags:ids'
+TAGS_CACHE_CONTROL = 'public, no-cache'
+RECIPES_GENERATION_KEY = 'api:recipes:generation'
+
+
+def get_tags():
+    """Сериализованный список тегов и его ETag.
+
+    Хранится в кэше TAGS_CACHE_TIMEOUT секунд и сбрасывается сигналами
+    модели Tag.
+    """
+    tags = cache.get(TAGS_CACHE_KEY)
+    if tags is None:
+        data = list(TagSerializer(Tag.objects.all(), many=True).data)
+        etag = hashlib.sha256(
+            json.dumps(data, sort_keys=True).encode()
+        ).hexdigest()
+        tags = (data, f'"{etag}"')
+        cache.set(TAGS_CACHE_KEY, tags, settings.TAGS_CACHE_TIMEOUT)
+    return tags
+
+
+def get_tag_ids(slugs=()):
+    """Соответствие слагов тегов их идентификаторам.
+
+    Если какого-либо из слагов slugs нет в кэше, соответствие читается из
+    базы заново: тег мог быть добавлен, а кэш еще не сброшен.
+    """
+    tag_ids = cache.get(TAG_IDS_CACHE_KEY)
+    if tag_ids is None or not tag_ids.keys() >= set(slugs):
+        tag_ids = dict(Tag.objects.values_list('slug', 'id'))
+        cache.set(TAG_IDS_CACHE_KEY, tag_ids, settings.TAGS_CACHE_TIMEOUT)
+    return tag_ids
+
+
+def get_tag_choices():
+    return [(slug, slug) for slug in get_tag_ids()]
+
+
+def invalidate_tags():
+    cache.delete_many([TAGS_CACHE_KEY, TAG_IDS_CACHE_KEY])
+
+
+def get_recipes_generation():
+    """Номер поколения кэша списка рецептов.
+
+    Начальное значение берется из текущего времени, чтобы после вытеснения
+    счетчика из кэша новые ключи не совпали со старыми.
+    """
+    generation = cache.get(RECIPES_GENERATION_KEY)
+    if generation is None:
+        cache.add(RECIPES_GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(RECIPES_GENERATION_KEY)
+    return generation
+
+
+def bump_recipes_generation():
+    try:
+        cache.incr(RECIPES_GENERATION_KEY)
+    except ValueError:
+        cache.set(RECIPES_GENERATION_KEY, time.time_ns(), None)
+
+
+def get_recipes_page_key(request):
+    """Ключ кэша страницы списка рецептов для анонимного пользователя.
+
+    Любое изменение рецептов, ингредиентов, тегов или авторов меняет
+    поколение, поэтому устаревшие страницы просто перестают читаться.
+    """
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values
+        )
+    )
+    return (
+        f'api:recipes:{get_recipes_generation()}:'
+        f'{request.get_host()}:{query}'
+    )
@@ -1,14 +1,24 @@
+from django.db.models import Exists, OuterRef
+from django_filters.fields import MultipleChoiceField
 from django_filters.rest_framework import FilterSet, filters
 
-from recipes.models import Recipe, Tag
+from api.cache import get_tag_choices, get_tag_ids
+from recipes.models import Recipe
+
+
+class TagsField(MultipleChoiceField):
+    """Слаги тегов; неизвестный кэшу слаг проверяется по базе."""
+
+    def valid_value(self, value):
+        return value in get_tag_ids([value])
+
+
+class TagsFilter(filters.MultipleChoiceFilter):
+    field_class = TagsField
 
 
 class RecipesFilter(FilterSet):
-    tags = filters.ModelMultipleChoiceFilter(
-        field_name='tags__slug',
-        to_field_name='slug',
-        queryset=Tag.objects.all(),
-    )
+    tags = TagsFilter(choices=get_tag_choices, method='tags_filter')
     is_favorited = filters.BooleanFilter(method='is_favorited_filter')
     is_in_shopping_cart = filters.BooleanFilter(
         method='is_in_shopping_cart_filter'
@@ -18,6 +28,17 @@ class RecipesFilter(FilterSet):
         model = Recipe
         fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart')
 
+    def tags_filter(self, queryset, name, value):
+        tag_ids = get_tag_ids(value)
+        return queryset.filter(
+            Exists(
+                Recipe.tags.through.objects.filter(
+                    recipe_id=OuterRef('pk'),
+                    tag_id__in=[tag_ids[slug] for slug in value],
+                )
+            )
+        )
+
     def is_favorited_filter(self, queryset, name, value):
         user = self.request.user
         if value and user.is_authenticated:
@@ -1,5 +1,245 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from recipes.timeline import get_feed
+
+
+def get_table_estimate(model, using):
+    """Оценка количества строк таблицы из статистики PostgreSQL."""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class ApproximateCountPaginator(Paginator):
+    """Paginator, который не считает большие выборки на каждый запрос.
+
+    Для списка без фильтров берется оценка из pg_class.reltuples, для
+    отфильтрованного списка точное число кэшируется по тексту запроса на
+    PAGINATION_COUNT_CACHE_TIMEOUT секунд. Оба способа применяются, только
+    если количество не меньше PAGINATION_COUNT_THRESHOLD; небольшие списки
+    считаются точно.
+
+    Приблизительное количество только отдается в ответе: если запрошенная
+    страница последняя или лежит за его пределами, оно заменяется точным,
+    чтобы последние страницы растущей таблицы не отвечали 404.
+    """
+
+    count_is_approximate = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return super().count
+        threshold = settings.PAGINATION_COUNT_THRESHOLD
+        if not queryset.query.where:
+            estimate = get_table_estimate(queryset.model, queryset.db)
+            if estimate is not None and estimate >= threshold:
+                self.count_is_approximate = True
+                return estimate
+        sql, params = queryset.values('pk').query.sql_with_params()
+        key = 'api:count:' + hashlib.sha256(
+            f'{sql}{params}'.encode()
+        ).hexdigest()
+        count = cache.get(key)
+        if count is not None:
+            self.count_is_approximate = True
+            return count
+        count = queryset.count()
+        if count >= threshold:
+            cache.set(key, count, settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+        return count
+
+    def use_exact_count(self):
+        """Заменяет приблизительное количество точным.
+
+        Возвращает False, если количество уже было точным.
+        """
+        if not self.count_is_approximate:
+            return False
+        self.count_is_approximate = False
+        self.count = self.object_list.count()
+        self.__dict__.pop('num_pages', None)
+        return True
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if not self.use_exact_count():
+                raise
+        return super().validate_number(number)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if number >= self.num_pages:
+            self.use_exact_count()
+        return super().page(number)
+
+
+class KeysetPagination(BasePagination):
+    """Курсорная пагинация по ключу сортировки без OFFSET и COUNT.
+
+    Курсор содержит значения полей ordering у последнего объекта страницы,
+    следующая страница начинается строго после них. Последнее поле
+    ordering должно быть уникальным. Ответ содержит только ссылку на
+    следующую страницу и результаты.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+    ordering = ('-pub_date', '-id')
+
+    def get_page_size(self, request):
+        limit = request.query_params.get(self.page_size_query_param, '')
+        if limit.isdigit() and int(limit) > 0:
+            return int(limit)
+        return self.page_size
+
+    def decode_cursor(self, request, model):
+        """Позиция из параметра cursor или None для первой страницы."""
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            values = urlsafe_b64decode(cursor.encode()).decode().split('|')
+            if len(values) != len(self.ordering):
+                raise ValueError
+            return tuple(
+                model._meta.get_field(name.lstrip('-')).to_python(value)
+                for name, value in zip(self.ordering, values)
+            )
+        except (ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position):
+        values = (
+            value.isoformat() if hasattr(value, 'isoformat') else str(value)
+            for value in position
+        )
+        return urlsafe_b64encode('|'.join(values).encode()).decode()
+
+    def get_position(self, instance):
+        return tuple(
+            getattr(instance, name.lstrip('-')) for name in self.ordering
+        )
+
+    def after(self, position):
+        """Условие для объектов, идущих после позиции в порядке ordering."""
+        condition = Q()
+        equal = {}
+        for name, value in zip(self.ordering, position):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{field}__{lookup}': value})
+            equal[field] = value
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        position = self.decode_cursor(request, queryset.model)
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(position))
+        page = list(queryset[: page_size + 1])
+        self.next_position = (
+            self.get_position(page[page_size - 1])
+            if len(page) > page_size
+            else None
+        )
+        return page[:page_size]
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.next_position),
+        )
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
 
 
 class CustomPaginator(PageNumberPagination):
+    """Постраничная пагинация с переключением на курсорную.
+
+    Если в запросе есть параметр ?cursor= (пустой для первой страницы),
+    а представление задает cursor_ordering, страницы выбираются
+    KeysetPagination по ключу сортировки без OFFSET и без подсчета общего
+    количества.
+    """
+
+    django_paginator_class = ApproximateCountPaginator
     page_size_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    cursor_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = getattr(view, 'cursor_ordering', None)
+        if ordering and self.cursor_query_param in request.query_params:
+            self.cursor_paginator = KeysetPagination()
+            self.cursor_paginator.ordering = ordering
+            self.cursor_paginator.page_size = self.page_size
+            self.cursor_paginator.page_size_query_param = (
+                self.page_size_query_param
+            )
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class FeedPagination(KeysetPagination):
+    """Курсорная пагинация ленты подписок по ключу (pub_date, id рецепта).
+
+    Страница выбирается из записей ленты, после чего ее рецепты
+    загружаются одним запросом.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        entries = get_feed(
+            request.user.pk,
+            page_size + 1,
+            self.decode_cursor(request, queryset.model),
+        )
+        self.next_position = (
+            entries[page_size - 1] if len(entries) > page_size else None
+        )
+        ids = [recipe_id for _, recipe_id in entries[:page_size]]
+        recipes = queryset.in_bulk(ids)
+        return [recipes[pk] for pk in ids if pk in recipes]
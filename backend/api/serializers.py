@@ -1,16 +1,38 @@
+import filetype
 import webcolors
 from django.conf import settings
 from django.contrib.auth.password_validation import validate_password
 from django.core import exceptions
+from django.db import transaction
 from djoser.serializers import UserCreateSerializer, UserSerializer
-from drf_extra_fields.fields import Base64ImageField
+from drf_extra_fields.fields import Base64FileField, Base64ImageField
 from rest_framework import serializers
 
+from recipes.images import FORMATS, RENDITIONS, schedule_renditions
 from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
 from users.models import User
 
 
-class UserSerializer(UserSerializer):
+class SubscribedMixin:
+    """Подписан ли текущий пользователь на автора.
+
+    Идентификаторы авторов, на которых подписан пользователь, загружаются
+    одним запросом и сохраняются в контексте корневого сериалайзера, общем
+    для всех вложенных сериалайзеров.
+    """
+
+    def get_is_subscribed(self, validated_data):
+        request = self.context.get('request')
+        if request is None or request.user.is_anonymous:
+            return False
+        if 'subscribed_ids' not in self.context:
+            self.context['subscribed_ids'] = set(
+                request.user.subscriber.values_list('author_id', flat=True)
+            )
+        return validated_data.id in self.context['subscribed_ids']
+
+
+class UserSerializer(SubscribedMixin, UserSerializer):
     """Cписок пользователей."""
 
     is_subscribed = serializers.SerializerMethodField()
@@ -26,18 +48,6 @@ class UserSerializer(UserSerializer):
             'is_subscribed',
         )
 
-    def get_is_subscribed(self, validated_data):
-        if (
-            self.context.get('request')
-            and not self.context['request'].user.is_anonymous
-        ):
-            return (
-                self.context['request']
-                .user.subscriber.filter(author=validated_data)
-                .exists()
-            )
-        return False
-
 
 class UserCreateSerializer(UserCreateSerializer):
     """Рождение пользователя."""
@@ -90,28 +100,68 @@ class Set_PasswordSerializer(serializers.Serializer):
                 {'new_password': 'Новый пароль должен отличаться от текущего.'}
             )
         instance.set_password(validated_data['new_password'])
-        instance.save()
+        instance.save(update_fields=['password'])
         return validated_data
 
 
+class ImageRenditionsField(serializers.Field):
+    """Уменьшенные копии фотографии рецепта.
+
+    Для каждой копии отдается ширина, а для каждого формата ссылка на
+    файл и хеш содержимого.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        if not recipe.image or not recipe.has_renditions:
+            return None
+        return {
+            name: self.get_rendition(
+                recipe.image.storage, recipe.image_renditions[name]
+            )
+            for name in RENDITIONS
+        }
+
+    def get_rendition(self, storage, rendition):
+        data = {'width': rendition['width']}
+        for file_format in FORMATS:
+            data[file_format] = {
+                'url': self.get_url(storage, rendition[file_format]['path']),
+                'hash': rendition[file_format]['hash'],
+            }
+        return data
+
+    def get_url(self, storage, path):
+        url = storage.url(path)
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+
 class RecipeListSerializer(serializers.ModelSerializer):
     """Список рецептов."""
 
     image = Base64ImageField(read_only=True)
+    renditions = ImageRenditionsField()
     name = serializers.ReadOnlyField()
     cooking_time = serializers.ReadOnlyField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'renditions', 'cooking_time')
 
 
-class SubscriptionsSerializer(serializers.ModelSerializer):
+class SubscriptionsSerializer(SubscribedMixin, serializers.ModelSerializer):
     """Список авторов на которых подписан пользователь."""
 
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.ReadOnlyField()
 
     class Meta:
         model = User
@@ -126,34 +176,25 @@ class SubscriptionsSerializer(serializers.ModelSerializer):
             'recipes_count',
         )
 
-    def get_is_subscribed(self, validated_data):
-        user = self.context['request'].user
-        return (
-            user.is_authenticated
-            and user.subscriber.filter(author=validated_data).exists()
-        )
-
-    def get_recipes_count(self, validated_data):
-        return validated_data.recipes.count()
-
     def get_recipes(self, validated_data):
-        request = self.context.get('request')
-        limit = request.GET.get('recipes_limit')
-        recipes = validated_data.recipes.all()
-        if limit:
-            recipes = recipes[: int(limit)]
+        recipes = getattr(validated_data, 'feed_recipes', None)
+        if recipes is None:
+            limit = self.context['request'].GET.get('recipes_limit', '')
+            recipes = validated_data.recipes.all()
+            if limit.isdigit():
+                recipes = recipes[: int(limit)]
         serializer = RecipeListSerializer(recipes, many=True, read_only=True)
         return serializer.data
 
 
-class SubscribeListSerializer(serializers.ModelSerializer):
+class SubscribeListSerializer(SubscribedMixin, serializers.ModelSerializer):
     """Подписка на автора и удаление подписки."""
 
     email = serializers.ReadOnlyField()
     username = serializers.ReadOnlyField()
     is_subscribed = serializers.SerializerMethodField()
     recipes = RecipeListSerializer(many=True, read_only=True)
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.ReadOnlyField()
 
     class Meta:
         model = User
@@ -175,16 +216,6 @@ class SubscribeListSerializer(serializers.ModelSerializer):
             )
         return validated_data
 
-    def get_is_subscribed(self, validated_data):
-        user = self.context['request'].user
-        return (
-            user.is_authenticated
-            and user.subscriber.filter(author=validated_data).exists()
-        )
-
-    def get_recipes_count(self, validated_data):
-        return validated_data.recipes.count()
-
 
 class Hex2NameColor(serializers.Field):
     """Сериалайзер для поля цветов тега."""
@@ -200,6 +231,22 @@ class Hex2NameColor(serializers.Field):
         return data
 
 
+class StagedImageField(Base64FileField):
+    """Фотография в base64 без разбора изображения в запросе.
+
+    Формат определяется по сигнатуре файла, а само изображение
+    открывается при фоновой подготовке уменьшенных копий.
+    """
+
+    ALLOWED_TYPES = ('jpg', 'png', 'gif', 'webp')
+    INVALID_FILE_MESSAGE = 'Загрузите корректное изображение.'
+    INVALID_TYPE_MESSAGE = 'Поддерживаются изображения JPEG, PNG, GIF и WebP.'
+
+    def get_file_extension(self, filename, decoded_file):
+        extension = filetype.guess_extension(decoded_file)
+        return 'jpg' if extension == 'jpeg' else extension
+
+
 class TagSerializer(serializers.ModelSerializer):
     """Сериалайзер для Тэгов."""
 
@@ -242,6 +289,7 @@ class RecipeSerializer(serializers.ModelSerializer):
     name = serializers.ReadOnlyField()
     cooking_time = serializers.ReadOnlyField()
     image = Base64ImageField()
+    renditions = ImageRenditionsField()
     author = UserSerializer(read_only=True)
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
@@ -256,12 +304,15 @@ class RecipeSerializer(serializers.ModelSerializer):
             'is_favorited',
             'is_in_shopping_cart',
             'image',
+            'renditions',
             'name',
             'cooking_time',
             'text',
         )
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         user = self.context.get('request').user
         return (
             user.is_authenticated
@@ -269,6 +320,8 @@ class RecipeSerializer(serializers.ModelSerializer):
         )
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         user = self.context.get('request').user
         return (
             user.is_authenticated
@@ -299,7 +352,7 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
     tags = serializers.PrimaryKeyRelatedField(
         many=True, queryset=Tag.objects.all()
     )
-    image = Base64ImageField(required=False, allow_null=True)
+    image = StagedImageField(required=False, allow_null=True)
     author = UserSerializer(read_only=True)
     cooking_time = serializers.IntegerField(
         max_value=settings.MAX_LIMIT, min_value=settings.MIN_LIMIT
@@ -333,13 +386,44 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         ingredients = validated_data.pop('ingredients')
         instance = super().create(validated_data)
         self.add_ingredients(instance, ingredients)
+        schedule_renditions(instance)
         return instance
 
+    def update_ingredients(self, recipe, ingredients):
+        """Меняет только отличающиеся строки ингредиентов рецепта.
+
+        Новые ингредиенты добавляются, у оставшихся обновляется количество,
+        если оно изменилось, отсутствующие в запросе удаляются.
+        """
+        current = {
+            item.ingredient_id: item
+            for item in recipe.recipe_ingredients.all()
+        }
+        added = []
+        changed = []
+        for ingredient_data in ingredients:
+            item = current.pop(ingredient_data['ingredient'].id, None)
+            if item is None:
+                added.append(ingredient_data)
+            elif item.amount != ingredient_data['amount']:
+                item.amount = ingredient_data['amount']
+                changed.append(item)
+        if current:
+            RecipeIngredient.objects.filter(
+                pk__in=[item.pk for item in current.values()]
+            ).delete()
+        RecipeIngredient.objects.bulk_update(changed, ['amount'])
+        self.add_ingredients(recipe, added)
+
+    @transaction.atomic
     def update(self, recipe, validated_data):
-        ingredients = validated_data.pop('ingredients')
-        RecipeIngredient.objects.filter(recipe=recipe).delete()
-        self.add_ingredients(recipe, ingredients)
-        return super().update(recipe, validated_data)
+        ingredients = validated_data.pop('ingredients', None)
+        if ingredients is not None:
+            self.update_ingredients(recipe, ingredients)
+        recipe = super().update(recipe, validated_data)
+        if validated_data.get('image') and not recipe.has_renditions:
+            schedule_renditions(recipe)
+        return recipe
 
     def to_representation(self, instance):
         return RecipeSerializer(instance, context=self.context).data
@@ -0,0 +1,58 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import invalidate_token
+from api.cache import bump_recipes_generation, invalidate_tags
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from users.models import User
+
+# Поля пользователя, которые не выводятся в рецептах.
+PRIVATE_USER_FIELDS = {'last_login', 'password'}
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def reset_tags_cache(sender, **kwargs):
+    invalidate_tags()
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def reset_recipes_cache(sender, **kwargs):
+    transaction.on_commit(bump_recipes_generation)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def reset_recipes_cache_for_author(
+    sender, created=False, update_fields=None, **kwargs
+):
+    if created or (
+        update_fields is not None
+        and set(update_fields) <= PRIVATE_USER_FIELDS
+    ):
+        return
+    transaction.on_commit(bump_recipes_generation)
+
+
+@receiver(post_delete, sender=Token)
+def reset_token_cache(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def reset_user_tokens_cache(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        for key in Token.objects.filter(user=instance).values_list(
+            'key', flat=True
+        ):
+            invalidate_token(key)
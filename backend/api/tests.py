@@ -0,0 +1,154 @@
+import os
+import re
+import runpy
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from recipes.models import (
+    Favorites,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    Shopping_cart,
+    Tag,
+)
+from users.models import Subscriptions, User
+
+RECIPES_URL = '/api/recipes/'
+FEED_URL = '/api/recipes/feed/'
+PAGE_SIZE = 6
+
+
+class RecipeListQueriesTest(APITestCase):
+    """Число запросов списка рецептов не зависит от объема данных."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@foodgram.ru', password='pass'
+        )
+        cls.reader = User.objects.create_user(
+            username='reader', email='reader@foodgram.ru', password='pass'
+        )
+        tags = [
+            Tag.objects.create(name=f'Тег {i}', color='#00ff00', slug=f't{i}')
+            for i in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {i}', measurement_unit='г'
+            )
+            for i in range(5)
+        ]
+        for i in range(PAGE_SIZE * 2):
+            recipe = Recipe.objects.create(
+                author=cls.author, name=f'Рецепт {i}', text='', cooking_time=5
+            )
+            recipe.tags.set(tags)
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(recipe=recipe, ingredient=item, amount=1)
+                for item in ingredients
+            )
+            Favorites.objects.create(user=cls.reader, recipe=recipe)
+            Shopping_cart.objects.create(user=cls.reader, recipe=recipe)
+
+    def setUp(self):
+        cache.clear()
+
+    def add_favorites(self, users):
+        """Добавляет все рецепты в избранное и корзины новых пользователей."""
+        for i in range(users):
+            user = User.objects.create_user(
+                username=f'user{i}', email=f'user{i}@foodgram.ru'
+            )
+            for recipe in Recipe.objects.all():
+                Favorites.objects.create(user=user, recipe=recipe)
+                Shopping_cart.objects.create(user=user, recipe=recipe)
+
+    def get_page(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(RECIPES_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), PAGE_SIZE)
+        cache.clear()
+        return response, context.captured_queries
+
+    def assert_rows_per_page(self, queries):
+        """Связанные строки читаются только для рецептов текущей страницы."""
+        for query in queries:
+            sql = query['sql']
+            self.assertNotRegex(
+                sql, r'FROM "recipes_(favorites|shopping_cart)" (WHERE|INNER)'
+            )
+            if sql.startswith('SELECT "recipes_recipe"."id"'):
+                self.assertIn(f'LIMIT {PAGE_SIZE}', sql)
+            for ids in re.findall(r'"recipe_id" IN \(([^)]*)\)', sql):
+                self.assertLessEqual(len(ids.split(',')), PAGE_SIZE)
+
+    def test_anonymous_list(self):
+        response, queries = self.get_page()
+        self.assertEqual(len(queries), 5)
+        self.assert_rows_per_page(queries)
+        self.assertFalse(response.data['results'][0]['is_favorited'])
+        self.add_favorites(3)
+        self.assertEqual(len(self.get_page()[1]), len(queries))
+
+    def test_authenticated_list(self):
+        self.client.force_authenticate(self.reader)
+        response, queries = self.get_page()
+        self.assertEqual(len(queries), 6)
+        self.assert_rows_per_page(queries)
+        self.assertTrue(response.data['results'][0]['is_favorited'])
+        self.assertTrue(response.data['results'][0]['is_in_shopping_cart'])
+        self.add_favorites(3)
+        self.assertEqual(len(self.get_page()[1]), len(queries))
+
+
+@override_settings(FEED_FANOUT_MAX_FOLLOWERS=1)
+class FeedTest(APITestCase):
+    """Рецепты популярных авторов остаются в ленте после отписок."""
+
+    def test_not_fanned_out_recipe_after_unsubscribe(self):
+        author, reader, other = (
+            User.objects.create_user(
+                username=name, email=f'{name}@foodgram.ru'
+            )
+            for name in ('author', 'reader', 'other')
+        )
+        Subscriptions.objects.create(user=reader, author=author)
+        Subscriptions.objects.create(user=other, author=author)
+        recipe = Recipe.objects.create(
+            author=author, name='Рецепт', text='', cooking_time=5
+        )
+        Subscriptions.objects.filter(user=other).delete()
+        self.client.force_authenticate(reader)
+        response = self.client.get(FEED_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item['id'] for item in response.data['results']], [recipe.id]
+        )
+
+
+class PoolModeSettingsTest(SimpleTestCase):
+    """Режим пула PgBouncer отключает курсоры на стороне сервера."""
+
+    def load_database_settings(self, pool_mode):
+        with mock.patch.dict(os.environ, DB_POOL_MODE=pool_mode):
+            module = runpy.run_path(
+                str(settings.BASE_DIR / 'backend' / 'settings.py')
+            )
+        return module['DATABASES']['default']
+
+    def test_transaction_mode(self):
+        database = self.load_database_settings('transaction')
+        self.assertTrue(database['DISABLE_SERVER_SIDE_CURSORS'])
+
+    def test_session_mode(self):
+        database = self.load_database_settings('session')
+        self.assertFalse(database['DISABLE_SERVER_SIDE_CURSORS'])
@@ -1,7 +1,8 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework import routers
 
-from api import views
+from api import async_views, views
 
 app_name = 'api'
 
@@ -11,8 +12,15 @@ router.register('tags', views.TagViewsSet, basename='tags')
 router.register('recipes', views.RecipeViewSet, basename='recipes')
 router.register('ingredients', views.IngredientViewSet, basename='ingredients')
 
+async_urlpatterns = [
+    path('tags/', async_views.tag_list),
+    path('ingredients/', async_views.ingredient_list),
+    path('recipes/<int:pk>/', async_views.recipe_detail),
+]
+
 urlpatterns = [
     path('auth/', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
+    *(async_urlpatterns if settings.ASYNC_VIEWS else []),
     path('', include(router.urls)),
 ]
@@ -1,5 +1,11 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch, Value
 from django.db.models.query_utils import Q
-from django.shortcuts import HttpResponse, get_object_or_404
+from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import status, viewsets
@@ -8,9 +14,16 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
 from api import serializers
+from api.cache import TAGS_CACHE_CONTROL, get_recipes_page_key, get_tags
 from api.filters import RecipesFilter
-from api.pagination import CustomPaginator
+from api.pagination import CustomPaginator, FeedPagination
 from api.permissions import CustomAuthorOrReadOnly
+from api.renderers import (
+    CSVShoppingListRenderer,
+    PDFShoppingListRenderer,
+    TxtShoppingListRenderer,
+)
+from recipes.exports import shopping_list_response
 from recipes.models import (
     Favorites,
     Ingredient,
@@ -19,6 +32,7 @@ from recipes.models import (
     Shopping_cart,
     Tag,
 )
+from recipes.search import ingredient_index
 from users.models import Subscriptions, User
 
 
@@ -26,6 +40,7 @@ class CustomUserViewSet(UserViewSet):
     queryset = User.objects.all()
     permission_classes = (AllowAny,)
     pagination_class = CustomPaginator
+    cursor_ordering = None
 
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
@@ -62,6 +77,7 @@ class CustomUserViewSet(UserViewSet):
         permission_classes=(IsAuthenticated,),
         pagination_class=None,
     )
+    @transaction.atomic
     def subscribe(self, request, **kwargs):
         user = self.request.user
         author = get_object_or_404(User, id=kwargs['id'])
@@ -82,9 +98,20 @@ class CustomUserViewSet(UserViewSet):
         methods=['get'],
         permission_classes=(IsAuthenticated,),
         pagination_class=CustomPaginator,
+        cursor_ordering=('id',),
     )
     def subscriptions(self, request):
-        queryset = User.objects.filter(subscribing__user=request.user)
+        recipes = Recipe.objects.only(
+            'id', 'name', 'image', 'image_renditions', 'cooking_time', 'author'
+        ).order_by('-pub_date', '-id')
+        limit = request.query_params.get('recipes_limit', '')
+        if limit.isdigit():
+            recipes = recipes[: int(limit)]
+        queryset = User.objects.filter(
+            subscribing__user=request.user
+        ).prefetch_related(
+            Prefetch('recipes', queryset=recipes, to_attr='feed_recipes')
+        )
         page = self.paginate_queryset(queryset)
         serializer = serializers.SubscriptionsSerializer(
             page, many=True, context={'request': request}
@@ -92,28 +119,48 @@ class CustomUserViewSet(UserViewSet):
         return self.get_paginated_response(serializer.data)
 
 
+def tags_response(request, tags, etag):
+    """Список тегов с ETag или 304, если клиент уже получил эту версию."""
+    headers = {'ETag': etag, 'Cache-Control': TAGS_CACHE_CONTROL}
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(tags, headers=headers)
+
+
 class TagViewsSet(viewsets.ModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerializer
     pagination_class = None
     permission_classes = (AllowAny,)
 
+    def list(self, request, *args, **kwargs):
+        return tags_response(request, *get_tags())
+
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = serializers.IngredientSerializer
     pagination_class = None
     queryset = Ingredient.objects.all()
 
+    def get_limit(self):
+        limit = self.request.query_params.get('limit', '')
+        max_limit = settings.INGREDIENT_SEARCH_LIMIT
+        if limit.isdigit() and 0 < int(limit) < max_limit:
+            return int(limit)
+        return max_limit
+
     def get_queryset(self):
         queryset = Ingredient.objects.all()
         name = self.request.query_params.get('name')
-        if name is not None:
-            filter_one_input = queryset.filter(name__istartswith=name)
-            filter_center_input = queryset.filter(
-                ~Q(name__istartswith=name) & Q(name__icontains=name)
-            )
-            queryset = list(filter_one_input) + list(filter_center_input)
-        return queryset
+        if name is None:
+            return queryset[: self.get_limit()]
+        if settings.INGREDIENT_SEARCH_IN_MEMORY:
+            return ingredient_index.search(name, self.get_limit())
+        return (
+            queryset.filter(name__icontains=name)
+            .annotate(is_prefix=Q(name__istartswith=name))
+            .order_by('-is_prefix', 'name')[: self.get_limit()]
+        )
 
 
 class RecipeViewSet(viewsets.ModelViewSet):
@@ -122,22 +169,46 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipesFilter
     pagination_class = CustomPaginator
+    cursor_ordering = ('-pub_date', '-id')
     http_method_names = ['get', 'post', 'patch', 'create', 'delete']
 
     def get_serializer_class(self):
-        if self.action in ('list', 'retrive'):
+        if self.action in ('list', 'retrive', 'feed'):
             return serializers.RecipeSerializer
         return serializers.RecipeCreateSerializer
 
     def get_queryset(self):
-        recipes = Recipe.objects.prefetch_related(
+        user = self.request.user
+        recipes = Recipe.objects.select_related('author').prefetch_related(
             'recipe_ingredients__ingredient',
             'tags',
-            'favorite_recipe',
-            'shopping_recipe',
-        ).all()
-        return recipes
+        )
+        if user.is_authenticated:
+            return recipes.annotate(
+                is_favorited=Exists(
+                    Favorites.objects.filter(user=user, recipe=OuterRef('pk'))
+                ),
+                is_in_shopping_cart=Exists(
+                    Shopping_cart.objects.filter(
+                        user=user, recipe=OuterRef('pk')
+                    )
+                ),
+            )
+        return recipes.annotate(
+            is_favorited=Value(False), is_in_shopping_cart=Value(False)
+        )
+
+    def list(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+        key = get_recipes_page_key(request)
+        page = cache.get(key)
+        if page is None:
+            page = super().list(request, *args, **kwargs).data
+            cache.set(key, page, settings.RECIPES_CACHE_TIMEOUT)
+        return Response(page)
 
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
@@ -146,6 +217,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         methods=['post', 'delete'],
         permission_classes=(IsAuthenticated,),
     )
+    @transaction.atomic
     def favorite(self, request, **kwargs):
         recipe = get_object_or_404(Recipe, id=kwargs['pk'])
         if request.method == 'POST':
@@ -164,6 +236,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         permission_classes=(IsAuthenticated,),
         pagination_class=None,
     )
+    @transaction.atomic
     def shopping_cart(self, request, **kwargs):
         recipe = get_object_or_404(Recipe, id=kwargs['pk'])
         if request.method == 'POST':
@@ -182,32 +255,29 @@ class RecipeViewSet(viewsets.ModelViewSet):
         detail=False,
         methods=['get'],
         permission_classes=[IsAuthenticated],
+        pagination_class=FeedPagination,
+    )
+    def feed(self, request):
+        """Лента рецептов авторов, на которых подписан пользователь."""
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=[IsAuthenticated],
+        renderer_classes=[
+            TxtShoppingListRenderer,
+            CSVShoppingListRenderer,
+            PDFShoppingListRenderer,
+        ],
     )
     def download_shopping_cart(self, request):
-        user = request.user
-        shopping = user.shopping_user.all()
-        shopping_list = {}
-        for shop in shopping:
-            recipe = shop.recipe
-            ingredients = RecipeIngredient.objects.filter(recipe=recipe)
-            for ingredient in ingredients:
-                name = ingredient.ingredient.name
-                amount = ingredient.amount
-                measurement_unit = ingredient.ingredient.measurement_unit
-                if name not in shopping_list:
-                    shopping_list[name] = {
-                        'measurement_unit': measurement_unit,
-                        'amount': amount,
-                    }
-                else:
-                    shopping_list[name]['amount'] += amount
-        shop_list = [
-            f"{name} - {data['amount']}{data['measurement_unit']}"
-            for name, data in shopping_list.items()
-        ]
-        responce = HttpResponse(
-            'Cписок покупок:\n' + '\n'.join(shop_list),
-            content_type='text/plain',
+        return shopping_list_response(
+            RecipeIngredient.objects.filter(
+                recipe__shopping_recipe__user=request.user
+            ),
+            request.accepted_renderer.format,
+            asynchronous=isinstance(request._request, ASGIRequest),
         )
-        responce['Content-Disposition'] = 'attachment; filename=shop_list.txt'
-        return responce
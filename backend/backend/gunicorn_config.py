@@ -0,0 +1,97 @@
+"""Настройки gunicorn: gunicorn -c python:backend.gunicorn_config.
+
+Все значения можно переопределить переменными окружения GUNICORN_*.
+"""
+import math
+import os
+
+CGROUP_V2_CPU_MAX = '/sys/fs/cgroup/cpu.max'
+CGROUP_V1_CFS_QUOTA = '/sys/fs/cgroup/cpu/cpu.cfs_quota_us'
+CGROUP_V1_CFS_PERIOD = '/sys/fs/cgroup/cpu/cpu.cfs_period_us'
+
+
+def read_file(path):
+    with open(path) as file:
+        return file.read().strip()
+
+
+def get_cpu_quota():
+    """Квота процессора контейнера (cgroup v2 или v1) и ее период.
+
+    Возвращает None, если квота не задана или не читается.
+    """
+    try:
+        quota, period = read_file(CGROUP_V2_CPU_MAX).split()
+    except (OSError, ValueError):
+        try:
+            quota = read_file(CGROUP_V1_CFS_QUOTA)
+            period = read_file(CGROUP_V1_CFS_PERIOD)
+        except OSError:
+            return None
+    try:
+        quota, period = int(quota), int(period)
+    except ValueError:
+        return None
+    if quota <= 0 or period <= 0:
+        return None
+    return quota, period
+
+
+def get_cpu_count():
+    """Число доступных процессу ядер с учетом квоты cgroup контейнера."""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+    cpu_quota = get_cpu_quota()
+    if cpu_quota is None:
+        return count
+    quota, period = cpu_quota
+    return max(min(count, math.ceil(quota / period)), 1)
+
+
+cpu_count = get_cpu_count()
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(
+    os.getenv('GUNICORN_THREADS', 4 if worker_class == 'gthread' else 1)
+)
+# Каждый поток держит свое соединение с базой, пока не истечет
+# DB_CONN_MAX_AGE, поэтому число воркеров по умолчанию ограничено так,
+# чтобы воркеры × потоки укладывались в GUNICORN_DB_CONNECTIONS.
+db_connections = int(os.getenv('GUNICORN_DB_CONNECTIONS', 40))
+workers = int(
+    os.getenv(
+        'GUNICORN_WORKERS',
+        max(min(cpu_count * 2 + 1, db_connections // threads), 1),
+    )
+)
+wsgi_app = os.getenv(
+    'GUNICORN_APP',
+    'backend.asgi:application'
+    if worker_class.startswith('uvicorn')
+    else 'backend.wsgi',
+)
+# Перезапуск воркеров после случайного числа запросов в пределах jitter
+# ограничивает рост памяти и не перезапускает все воркеры одновременно.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+# Django загружается один раз в мастере, воркеры делят память с ним.
+preload_app = os.getenv('GUNICORN_PRELOAD_APP', 'True').lower() == 'true'
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+
+def when_ready(server):
+    """Строит индекс ингредиентов в мастере до запуска воркеров."""
+    if not preload_app:
+        return
+    from django.conf import settings
+    from django.db import connections
+
+    if settings.INGREDIENT_SEARCH_IN_MEMORY:
+        from recipes.search import ingredient_index
+
+        ingredient_index.build()
+        connections.close_all()
@@ -20,6 +20,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'corsheaders',
@@ -71,6 +72,31 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
         'PORT': os.getenv('DB_PORT', 5432),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': (
+            os.getenv('DB_CONN_HEALTH_CHECKS', 'True').lower() == 'true'
+        ),
+        # В режиме transaction у PgBouncer курсоры на стороне сервера
+        # не переживают границу транзакции.
+        'DISABLE_SERVER_SIDE_CURSORS': (
+            os.getenv('DB_POOL_MODE', '') == 'transaction'
+        ),
+    }
+}
+
+# Кэш общий для всех воркеров gunicorn: сброс тегов и поколения списка
+# рецептов сигналами должен доходить до каждого процесса.
+CACHE_LOCATION = os.getenv('CACHE_LOCATION', '')
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.redis.RedisCache'
+            if CACHE_LOCATION
+            else 'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': CACHE_LOCATION,
     }
 }
 
@@ -114,7 +140,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly'
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication'
+        'api.authentication.CachedTokenAuthentication'
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 6,
@@ -133,5 +159,43 @@ MIN_LIMIT = 1
 LEN_EMAIL = 254
 LEN_STRING = 150
 
+INGREDIENT_SEARCH_IN_MEMORY = (
+    os.getenv('INGREDIENT_SEARCH_IN_MEMORY', 'False').lower() == 'true'
+)
+INGREDIENT_INDEX_TTL = int(os.getenv('INGREDIENT_INDEX_TTL', 300))
+INGREDIENT_SEARCH_LIMIT = 100
+
+TAGS_CACHE_TIMEOUT = int(os.getenv('TAGS_CACHE_TIMEOUT', 300))
+RECIPES_CACHE_TIMEOUT = int(os.getenv('RECIPES_CACHE_TIMEOUT', 300))
+PAGINATION_COUNT_THRESHOLD = int(
+    os.getenv('PAGINATION_COUNT_THRESHOLD', 10000)
+)
+PAGINATION_COUNT_CACHE_TIMEOUT = int(
+    os.getenv('PAGINATION_COUNT_CACHE_TIMEOUT', 60)
+)
+
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False').lower() == 'true'
+
+TOKEN_CACHE_SIZE = 10000
+TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', 30))
+TOKEN_CACHE_SHARED = (
+    os.getenv('TOKEN_CACHE_SHARED', 'False').lower() == 'true'
+)
+TOKEN_CACHE_SHARED_TTL = int(os.getenv('TOKEN_CACHE_SHARED_TTL', 300))
+
+FEED_FANOUT_MAX_FOLLOWERS = int(
+    os.getenv('FEED_FANOUT_MAX_FOLLOWERS', 1000)
+)
+FEED_BACKFILL_SIZE = 50
+FEED_TIMELINE_SIZE = int(os.getenv('FEED_TIMELINE_SIZE', 500))
+
+IMAGE_PROCESSING_WORKERS = int(os.getenv('IMAGE_PROCESSING_WORKERS', 2))
+
+SHOPPING_LIST_CHUNK_SIZE = 2000
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    'SHOPPING_LIST_PDF_FONT',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+)
+
 CORS_ORIGIN_ALLOW_ALL = True
 CORS_URLS_REGEX = r'^/api/.*$'
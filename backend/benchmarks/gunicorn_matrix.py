@@ -0,0 +1,100 @@
+"""Сравнение конфигураций gunicorn по запросам в секунду.
+
+Для каждой конфигурации запускает gunicorn с backend.gunicorn_config,
+прогоняет load_test и дописывает результат строкой JSON в файл.
+
+    python benchmarks/gunicorn_matrix.py http://127.0.0.1:8001/api/recipes/ \
+        --bind 127.0.0.1:8001 --output benchmarks/results.jsonl
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from load_test import run
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+CONFIGURATIONS = {
+    'sync-1': {'GUNICORN_WORKER_CLASS': 'sync', 'GUNICORN_WORKERS': '1'},
+    'sync-auto': {'GUNICORN_WORKER_CLASS': 'sync'},
+    'gthread-auto': {'GUNICORN_WORKER_CLASS': 'gthread'},
+    # Под ASGI постоянные соединения не переиспользуются потоками
+    # sync_to_async, поэтому режим поддерживается только с DB_CONN_MAX_AGE=0.
+    'uvicorn-auto': {
+        'GUNICORN_WORKER_CLASS': 'uvicorn_worker.UvicornWorker',
+        'ASYNC_VIEWS': 'True',
+        'DB_CONN_MAX_AGE': '0',
+    },
+}
+
+
+def wait_for_port(bind, timeout=30):
+    host, port = bind.rsplit(':', 1)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, int(port)), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f'gunicorn не запустился на {bind}')
+
+
+def benchmark(name, overrides, args, headers):
+    env = {
+        **os.environ,
+        'GUNICORN_BIND': args.bind,
+        'GUNICORN_MAX_REQUESTS': '0',
+        **overrides,
+    }
+    server = subprocess.Popen(
+        ['gunicorn', '-c', 'python:backend.gunicorn_config'],
+        cwd=BASE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(args.bind)
+        run(args.urls, args.concurrency, args.warmup, headers)
+        result = run(args.urls, args.concurrency, args.requests, headers)
+    finally:
+        server.terminate()
+        server.wait()
+    return {'configuration': name, **overrides, **result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('urls', nargs='+')
+    parser.add_argument('--bind', default='127.0.0.1:8001')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--warmup', type=int, default=200)
+    parser.add_argument('--token')
+    parser.add_argument(
+        '--configuration',
+        action='append',
+        choices=CONFIGURATIONS,
+        help='Конфигурация для проверки, по умолчанию все.',
+    )
+    parser.add_argument('--output', type=Path)
+    args = parser.parse_args()
+    headers = {'Authorization': f'Token {args.token}'} if args.token else {}
+    for name in args.configuration or CONFIGURATIONS:
+        result = benchmark(name, CONFIGURATIONS[name], args, headers)
+        line = json.dumps(result)
+        print(line)
+        if args.output:
+            with open(args.output, 'a') as file:
+                file.write(line + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
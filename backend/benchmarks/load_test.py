@@ -0,0 +1,104 @@
+"""Нагрузочный тест API без внешних зависимостей.
+
+Каждый поток держит свое keep-alive соединение и по кругу запрашивает
+переданные адреса. В конце печатаются запросы в секунду, p50 и p99.
+
+    python benchmarks/load_test.py http://localhost:8000/api/tags/ \
+        http://localhost:8000/api/recipes/1/ --concurrency 32 --requests 5000
+"""
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+from itertools import cycle, islice
+from urllib.parse import urlsplit
+
+
+def percentile(timings, value):
+    timings = sorted(timings)
+    return timings[min(int(len(timings) * value), len(timings) - 1)]
+
+
+def worker(urls, count, headers, timings, errors, lock):
+    connections = {}
+    local_timings = []
+    local_errors = 0
+    for url in islice(cycle(urls), count):
+        parts = urlsplit(url)
+        path = parts.path + (f'?{parts.query}' if parts.query else '')
+        started = time.perf_counter()
+        try:
+            if parts.netloc not in connections:
+                connections[parts.netloc] = http.client.HTTPConnection(
+                    parts.netloc, timeout=30
+                )
+            connection = connections[parts.netloc]
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                local_errors += 1
+        except (OSError, http.client.HTTPException):
+            connections.pop(parts.netloc, None)
+            local_errors += 1
+        local_timings.append((time.perf_counter() - started) * 1000)
+    with lock:
+        timings.extend(local_timings)
+        errors.append(local_errors)
+
+
+def run(urls, concurrency, requests, headers):
+    """Выполняет тест и возвращает словарь с результатами."""
+    timings, errors, lock = [], [], threading.Lock()
+    per_thread = max(requests // concurrency, 1)
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(urls, per_thread, headers, timings, errors, lock),
+        )
+        for _ in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        'requests': len(timings),
+        'errors': sum(errors),
+        'rps': round(len(timings) / elapsed, 1),
+        'mean_ms': round(statistics.mean(timings), 2),
+        'p50_ms': round(percentile(timings, 0.5), 2),
+        'p99_ms': round(percentile(timings, 0.99), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('urls', nargs='+')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument(
+        '--token', help='Токен пользователя для заголовка Authorization.'
+    )
+    parser.add_argument(
+        '--json', action='store_true', help='Вывести результат в JSON.'
+    )
+    args = parser.parse_args()
+    headers = {'Authorization': f'Token {args.token}'} if args.token else {}
+    result = run(args.urls, args.concurrency, args.requests, headers)
+    if args.json:
+        print(json.dumps(result))
+        return
+    print(
+        f'Запросов: {result["requests"]}, ошибок: {result["errors"]}, '
+        f'{result["rps"]} запросов/с, среднее {result["mean_ms"]} мс, '
+        f'p50 {result["p50_ms"]} мс, p99 {result["p99_ms"]} мс'
+    )
+
+
+if __name__ == '__main__':
+    main()
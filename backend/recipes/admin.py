@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.core.handlers.asgi import ASGIRequest
 
 from recipes import models
+from recipes.exports import shopping_list_response
 
 
 class RecipesIngredientInline(admin.TabularInline):
@@ -31,10 +33,19 @@ class RecipeAdmin(admin.ModelAdmin):
     list_filter = ('name', 'author', 'tags')
     empty_value_display = '-пусто-'
     inlines = (RecipesIngredientInline,)
+    actions = ('download_ingredients',)
 
     @admin.display(description='В избранном')
     def in_favorites(self, obj):
-        return obj.favorite_recipe.count()
+        return obj.favorites_count
+
+    @admin.action(description='Скачать список ингредиентов (CSV)')
+    def download_ingredients(self, request, queryset):
+        return shopping_list_response(
+            models.RecipeIngredient.objects.filter(recipe__in=queryset),
+            'csv',
+            asynchronous=isinstance(request, ASGIRequest),
+        )
 
 
 @admin.register(models.RecipeIngredient)
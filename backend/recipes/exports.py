@@ -0,0 +1,143 @@
+import csv
+import os
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Sum
+from django.http import StreamingHttpResponse
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+from recipes.pdf import PDFWriter
+
+TITLE = 'Cписок покупок:'
+CSV_HEADER = ('Ингредиент', 'Количество', 'Единица измерения')
+PDF_FONT_NAME = 'ShoppingListFont'
+PDF_FONT_SIZE = 12
+PDF_MARGIN = 50
+PDF_LINE_HEIGHT = 18
+ASYNC_BATCH_SIZE = 100
+
+
+def aggregate_ingredients(recipe_ingredients):
+    """Суммирует количество ингредиентов одним GROUP BY запросом."""
+    return (
+        recipe_ingredients.values(
+            'ingredient__name', 'ingredient__measurement_unit'
+        )
+        .annotate(amount=Sum('amount'))
+        .order_by('ingredient__name', 'ingredient__measurement_unit')
+    )
+
+
+def iter_rows(ingredients):
+    """Строки списка покупок, читаемые курсором на стороне сервера."""
+    for ingredient in ingredients.iterator(
+        chunk_size=settings.SHOPPING_LIST_CHUNK_SIZE
+    ):
+        yield (
+            ingredient['ingredient__name'],
+            ingredient['amount'],
+            ingredient['ingredient__measurement_unit'],
+        )
+
+
+def render_txt(rows):
+    yield f'{TITLE}\n'
+    for name, amount, measurement_unit in rows:
+        yield f'{name} - {amount}{measurement_unit}\n'
+
+
+class Echo:
+    """Псевдобуфер для csv.writer, возвращающий записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def render_csv(rows):
+    writer = csv.writer(Echo())
+    yield '\ufeff' + writer.writerow(CSV_HEADER)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def get_pdf_font():
+    """Шрифт с кириллицей, если он есть в системе, иначе None."""
+    if PDF_FONT_NAME in pdfmetrics.getRegisteredFontNames():
+        return pdfmetrics.getFont(PDF_FONT_NAME)
+    if not os.path.exists(settings.SHOPPING_LIST_PDF_FONT):
+        return None
+    font = TTFont(PDF_FONT_NAME, settings.SHOPPING_LIST_PDF_FONT)
+    pdfmetrics.registerFont(font)
+    return font
+
+
+def render_pdf(rows):
+    """Отдает PDF постранично по мере чтения строк из базы.
+
+    В памяти держится только текущая страница, шрифт с использованными
+    символами записывается в конце документа.
+    """
+    width, height = A4
+    lines_per_page = int((height - 2 * PDF_MARGIN) // PDF_LINE_HEIGHT) + 1
+    pdf = PDFWriter(width, height, get_pdf_font(), PDF_FONT_SIZE)
+    try:
+        yield pdf.start()
+        lines = [TITLE]
+        for name, amount, measurement_unit in rows:
+            if len(lines) == lines_per_page:
+                yield pdf.add_page(
+                    lines, PDF_MARGIN, height - PDF_MARGIN, PDF_LINE_HEIGHT
+                )
+                lines = []
+            lines.append(f'{name} - {amount}{measurement_unit}')
+        yield pdf.add_page(
+            lines, PDF_MARGIN, height - PDF_MARGIN, PDF_LINE_HEIGHT
+        )
+        yield pdf.finish()
+    finally:
+        pdf.close()
+
+
+EXPORTERS = {
+    'txt': (render_txt, 'text/plain; charset=utf-8'),
+    'csv': (render_csv, 'text/csv; charset=utf-8'),
+    'pdf': (render_pdf, 'application/pdf'),
+}
+
+
+async def iterate_async(chunks):
+    """Асинхронный итератор по частям синхронного генератора.
+
+    Части читаются пачками в потоке через sync_to_async: иначе ASGI-сервер
+    собирает синхронный генератор целиком в список перед отправкой.
+    """
+    chunks = iter(chunks)
+    while True:
+        batch = await sync_to_async(list)(islice(chunks, ASYNC_BATCH_SIZE))
+        if not batch:
+            return
+        for chunk in batch:
+            yield chunk
+
+
+def shopping_list_response(
+    recipe_ingredients, file_format='txt', asynchronous=False
+):
+    """Потоковый ответ со списком покупок в выбранном формате.
+
+    При asynchronous=True, то есть под ASGI, содержимое отдается
+    асинхронным итератором.
+    """
+    render, content_type = EXPORTERS[file_format]
+    content = render(iter_rows(aggregate_ingredients(recipe_ingredients)))
+    if asynchronous:
+        content = iterate_async(content)
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = (
+        f'attachment; filename=shop_list.{file_format}'
+    )
+    return response
@@ -0,0 +1,148 @@
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from recipes.models import Recipe
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS = {
+    'thumbnail': 320,
+    'card': 640,
+    'full': 1280,
+}
+FORMATS = {
+    'webp': 'WEBP',
+    'jpeg': 'JPEG',
+}
+RENDITIONS_PATH = 'recipes/renditions'
+QUALITY = 80
+HASH_LENGTH = 16
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Пул потоков для обработки фотографий, свой в каждом процессе."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_PROCESSING_WORKERS,
+                thread_name_prefix='recipe-images',
+            )
+    return _executor
+
+
+def resize(image, width):
+    if image.width <= width:
+        return image
+    height = max(round(image.height * width / image.width), 1)
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def encode(image, file_format):
+    if file_format == 'jpeg' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, FORMATS[file_format], quality=QUALITY)
+    return buffer.getvalue()
+
+
+def make_renditions(recipe):
+    """Сохраняет уменьшенные копии фотографии в WebP и JPEG.
+
+    Возвращает словарь с шириной каждой копии, путями к файлам в
+    хранилище и хешами их содержимого. Ключ source содержит имя исходного
+    файла, чтобы копии старой фотографии не отдавались после ее замены.
+    """
+    storage = recipe.image.storage
+    with recipe.image.open('rb') as file, Image.open(file) as original:
+        original = ImageOps.exif_transpose(original)
+        renditions = {'source': recipe.image.name}
+        for name, width in RENDITIONS.items():
+            image = resize(original, width)
+            rendition = {'width': image.width}
+            for file_format in FORMATS:
+                content = encode(image, file_format)
+                path = f'{RENDITIONS_PATH}/{name}.{file_format}'
+                rendition[file_format] = {
+                    'path': storage.save(path, ContentFile(content)),
+                    'hash': hashlib.sha256(content).hexdigest()[:HASH_LENGTH],
+                }
+            renditions[name] = rendition
+    return renditions
+
+
+def rendition_paths(renditions):
+    """Пути ко всем файлам копий из словаря image_renditions."""
+    for name in RENDITIONS:
+        for file_format in FORMATS:
+            path = renditions.get(name, {}).get(file_format, {}).get('path')
+            if path:
+                yield path
+
+
+def process_recipe_image(recipe_id):
+    """Готовит копии фотографии рецепта и сохраняет их в рецепт.
+
+    Возвращает True, если копии сохранены.
+    """
+    recipe = Recipe.objects.filter(pk=recipe_id).only('id', 'image').first()
+    if recipe is None or not recipe.image:
+        return False
+    try:
+        renditions = make_renditions(recipe)
+    except (OSError, Image.DecompressionBombError):
+        logger.warning(
+            'Не удалось обработать фотографию рецепта %s',
+            recipe_id,
+            exc_info=True,
+        )
+        return False
+    with transaction.atomic():
+        recipe = (
+            Recipe.objects.select_for_update()
+            .only('id', 'image', 'image_renditions')
+            .filter(pk=recipe_id)
+            .first()
+        )
+        if recipe is None or recipe.image.name != renditions['source']:
+            return False
+        recipe.image_renditions = renditions
+        recipe.save(update_fields=['image_renditions'])
+    return True
+
+
+def process_in_background(recipe_id):
+    close_old_connections()
+    try:
+        process_recipe_image(recipe_id)
+    except Exception:
+        logger.exception('Ошибка обработки фотографии рецепта %s', recipe_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_renditions(recipe):
+    """Ставит обработку фотографии в очередь после фиксации транзакции.
+
+    При IMAGE_PROCESSING_WORKERS = 0 копии готовятся сразу в том же
+    процессе.
+    """
+    if not recipe.image:
+        return
+    if settings.IMAGE_PROCESSING_WORKERS:
+        transaction.on_commit(
+            lambda: get_executor().submit(process_in_background, recipe.pk)
+        )
+    else:
+        transaction.on_commit(lambda: process_recipe_image(recipe.pk))
@@ -0,0 +1,75 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+ITERATIONS = 200
+
+
+def measure(connection, iterations, reconnect):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        if reconnect:
+            connection.close()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        timings.append((time.perf_counter() - started) * 1000)
+    connection.close()
+    return timings
+
+
+def percentile(timings, value):
+    timings = sorted(timings)
+    return timings[min(int(len(timings) * value), len(timings) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время запроса с новым соединением к базе и с уже '
+        'открытым, чтобы оценить выигрыш от CONN_MAX_AGE и пула.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=ITERATIONS,
+            help='Количество запросов в каждом режиме.',
+        )
+        parser.add_argument(
+            '--database',
+            default='default',
+            help='Псевдоним базы из DATABASES.',
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations должен быть больше нуля.')
+        connection = connections[options['database']]
+        db_settings = connection.settings_dict
+        self.stdout.write(
+            f'База: {connection.vendor} {db_settings["HOST"]}, '
+            f'CONN_MAX_AGE={db_settings["CONN_MAX_AGE"]}, '
+            f'CONN_HEALTH_CHECKS={db_settings["CONN_HEALTH_CHECKS"]}'
+        )
+        results = {}
+        for title, reconnect in (
+            ('Новое соединение на запрос', True),
+            ('Постоянное соединение', False),
+        ):
+            timings = measure(connection, options['iterations'], reconnect)
+            results[reconnect] = statistics.mean(timings)
+            self.stdout.write(
+                f'{title}: среднее {results[reconnect]:.2f} мс, '
+                f'p50 {percentile(timings, 0.5):.2f} мс, '
+                f'p99 {percentile(timings, 0.99):.2f} мс'
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                'Стоимость установки соединения: '
+                f'{results[True] - results[False]:.2f} мс на запрос.'
+            )
+        )
@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.images import RENDITIONS_PATH, rendition_paths
+from recipes.models import Recipe
+
+MIN_AGE = 24 * 60 * 60
+
+
+def walk(storage, path):
+    directories, files = storage.listdir(path)
+    for file in files:
+        yield f'{path}/{file}'
+    for directory in directories:
+        yield from walk(storage, f'{path}/{directory}')
+
+
+def referenced_files():
+    """Имена всех файлов, на которые ссылаются рецепты."""
+    names = set()
+    for image, renditions in (
+        Recipe.objects.exclude(image='')
+        .exclude(image__isnull=True)
+        .values_list('image', 'image_renditions')
+        .iterator()
+    ):
+        names.add(image)
+        names.update(rendition_paths(renditions))
+    return names
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет фотографии и их копии, на которые больше не ссылается '
+        'ни один рецепт.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=MIN_AGE,
+            help=(
+                'Не трогать файлы моложе указанного числа секунд, чтобы не '
+                'удалить загрузки, которые еще не сохранены в рецепт.'
+            ),
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать файлы, которые будут удалены.',
+        )
+
+    def handle(self, *args, **options):
+        field = Recipe._meta.get_field('image')
+        storage = field.storage
+        created_before = timezone.now() - timedelta(
+            seconds=options['min_age']
+        )
+        referenced = referenced_files()
+        removed = freed = 0
+        for path in (field.upload_to.rstrip('/'), RENDITIONS_PATH):
+            if not storage.exists(path):
+                continue
+            for name in walk(storage, path):
+                if (
+                    name in referenced
+                    or storage.get_modified_time(name) > created_before
+                ):
+                    continue
+                removed += 1
+                freed += storage.size(name)
+                if options['dry_run']:
+                    self.stdout.write(name)
+                else:
+                    storage.delete(name)
+        action = 'Будет удалено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{action} файлов: {removed} ({freed / 1024 / 1024:.1f} МБ).'
+            )
+        )
@@ -1,7 +1,11 @@
 import csv
+import json
+import time
+from itertools import islice
 from pathlib import Path
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 
 from recipes.models import Ingredient
 
@@ -9,27 +13,125 @@ COMMAND_TO_IMPORT = 'start'
 
 PATH = Path.cwd() / 'recipes' / 'data'
 
+BATCH_SIZE = 5000
 
-def add_ingredient(row):
-    ingredient = Ingredient(
-        name=row['name'],
-        measurement_unit=row['measurement_unit'],
-    )
-    ingredient.save()
+STAGING_TABLE = 'recipes_ingredient_staging'
+
+
+def read_csv(file):
+    yield from csv.DictReader(file)
+
+
+def read_json(file):
+    yield from json.load(file)
+
+
+READERS = {
+    '.csv': read_csv,
+    '.json': read_json,
+}
+
+
+def read_ingredients(rows):
+    for row in rows:
+        name = row['name'].strip()
+        measurement_unit = row['measurement_unit'].strip()
+        if name and measurement_unit:
+            yield Ingredient(name=name, measurement_unit=measurement_unit)
 
 
 class Command(BaseCommand):
+    help = (
+        'Загружает ингредиенты из CSV или JSON файла. Повторный запуск '
+        'не создает дубликатов.'
+    )
+
     def add_arguments(self, parser):
-        parser.add_argument(COMMAND_TO_IMPORT)
-
-    def handle(self, *args, **kwargs):
-        imported_models = {
-            'ingredients.csv': add_ingredient,
-        }
-
-        for key in imported_models.keys():
-            with open((f'{PATH}/{key}'), encoding='utf-8') as csvfile:
-                contents = csv.DictReader(csvfile)
-                for row in contents:
-                    imported_models[key](row)
-        self.stdout.write(self.style.SUCCESS('Данные загружены успешно!'))
+        parser.add_argument(COMMAND_TO_IMPORT, nargs='?')
+        parser.add_argument(
+            '--file',
+            type=Path,
+            default=PATH / 'ingredients.csv',
+            help='Файл с колонками name и measurement_unit (.csv, .json).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Количество строк в одном INSERT.',
+        )
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help=(
+                'Загрузить CSV командой COPY во временную таблицу и '
+                'перенести одним INSERT ... ON CONFLICT (только PostgreSQL).'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        path = options['file']
+        batch_size = options['batch_size']
+        if path.suffix not in READERS:
+            raise CommandError(f'Неподдерживаемый формат файла: {path}')
+        if batch_size < 1:
+            raise CommandError('--batch-size должен быть больше нуля.')
+        if options['copy'] and (
+            path.suffix != '.csv' or connection.vendor != 'postgresql'
+        ):
+            raise CommandError('--copy работает только с CSV и PostgreSQL.')
+        count_before = Ingredient.objects.count()
+        started = time.monotonic()
+        with open(path, encoding='utf-8') as file, transaction.atomic():
+            if options['copy']:
+                processed = self.copy_ingredients(file)
+            else:
+                processed = self.create_ingredients(
+                    READERS[path.suffix](file), batch_size, started
+                )
+        elapsed = time.monotonic() - started
+        created = Ingredient.objects.count() - count_before
+        self.stdout.write('')
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Данные загружены успешно! Обработано строк: {processed}, '
+                f'добавлено новых: {created}, за {elapsed:.2f} с '
+                f'({processed / max(elapsed, 1e-9):.0f} строк/с).'
+            )
+        )
+
+    def create_ingredients(self, rows, batch_size, started):
+        processed = 0
+        ingredients = read_ingredients(rows)
+        while batch := list(islice(ingredients, batch_size)):
+            Ingredient.objects.bulk_create(batch, ignore_conflicts=True)
+            processed += len(batch)
+            self.stdout.write(
+                f'Обработано строк: {processed} '
+                f'({processed / (time.monotonic() - started):.0f} строк/с)',
+                ending='\r',
+            )
+        return processed
+
+    def copy_ingredients(self, file):
+        table = Ingredient._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE {STAGING_TABLE} '
+                '(name text, measurement_unit text) ON COMMIT DROP'
+            )
+            cursor.copy_expert(
+                f'COPY {STAGING_TABLE} (name, measurement_unit) '
+                'FROM STDIN WITH (FORMAT csv, HEADER true)',
+                file,
+            )
+            cursor.execute(f'SELECT count(*) FROM {STAGING_TABLE}')
+            (processed,) = cursor.fetchone()
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                'SELECT DISTINCT btrim(name), btrim(measurement_unit) '
+                f'FROM {STAGING_TABLE} '
+                "WHERE btrim(name) <> '' AND btrim(measurement_unit) <> '' "
+                'ON CONFLICT (name, measurement_unit) DO NOTHING'
+            )
+        return processed
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
+
+from recipes.models import Favorites, Recipe, Shopping_cart
+from users.models import Subscriptions, User
+
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorites, 'recipe'),
+    (Recipe, 'cart_count', Shopping_cart, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Subscriptions, 'author'),
+)
+
+
+def count_related(model, field):
+    return Coalesce(
+        models.Subquery(
+            model.objects.filter(**{field: models.OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=models.Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счетчики избранного, корзин, рецептов и подписчиков '
+        'и исправляет расхождения.'
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            for model, counter, related_model, field in COUNTERS:
+                total = count_related(related_model, field)
+                fixed = model.objects.exclude(**{counter: total}).update(
+                    **{counter: total}
+                )
+                self.stdout.write(
+                    f'{model._meta.verbose_name_plural}.{counter}: '
+                    f'исправлено записей: {fixed}'
+                )
+        self.stdout.write(self.style.SUCCESS('Счетчики пересчитаны.'))
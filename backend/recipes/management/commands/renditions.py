@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from recipes.images import process_recipe_image
+from recipes.models import Recipe
+
+
+def process(recipe_id):
+    try:
+        return process_recipe_image(recipe_id)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = (
+        'Готовит уменьшенные копии фотографий для рецептов, у которых их '
+        'еще нет.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Пересоздать копии для всех рецептов с фотографией.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=max(settings.IMAGE_PROCESSING_WORKERS, 1),
+            help='Количество потоков обработки.',
+        )
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers должен быть больше нуля.')
+        recipe_ids = [
+            recipe.id
+            for recipe in Recipe.objects.exclude(image='')
+            .exclude(image__isnull=True)
+            .only('id', 'image', 'image_renditions')
+            .iterator()
+            if options['force'] or not recipe.has_renditions
+        ]
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            results = list(executor.map(process, recipe_ids))
+        processed = sum(results)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Обработано рецептов: {processed}, '
+                f'с ошибками: {len(results) - processed}.'
+            )
+        )
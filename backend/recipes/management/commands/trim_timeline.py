@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.timeline import trim_timelines
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет из лент подписок записи старше FEED_TIMELINE_SIZE '
+        'последних рецептов каждого пользователя.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size',
+            type=int,
+            default=settings.FEED_TIMELINE_SIZE,
+            help='Сколько последних записей оставить в каждой ленте.',
+        )
+
+    def handle(self, *args, **options):
+        if options['size'] < 1:
+            raise CommandError('--size должен быть больше нуля.')
+        deleted = trim_timelines(options['size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Удалено записей лент: {deleted}.')
+        )
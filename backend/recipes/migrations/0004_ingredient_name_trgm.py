@@ -0,0 +1,26 @@
+# Generated by Django 4.2.16 on 2026-10-18 18:04
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('recipes', '0003_alter_recipe_author'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper('name'),
+                    name='gin_trgm_ops',
+                ),
+                name='ingredient_name_trgm',
+            ),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.16 on 2026-10-18 18:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    """Объединяет ингредиенты, загруженные повторным импортом."""
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    duplicates = (
+        Ingredient.objects.values('name', 'measurement_unit')
+        .annotate(keep_id=models.Min('id'), total=models.Count('id'))
+        .filter(total__gt=1)
+    )
+    for duplicate in duplicates:
+        keep_id = duplicate['keep_id']
+        duplicate_ids = list(
+            Ingredient.objects.filter(
+                name=duplicate['name'],
+                measurement_unit=duplicate['measurement_unit'],
+            )
+            .exclude(id=keep_id)
+            .values_list('id', flat=True)
+        )
+        kept = {
+            item.recipe_id: item
+            for item in RecipeIngredient.objects.filter(ingredient_id=keep_id)
+        }
+        for item in RecipeIngredient.objects.filter(
+            ingredient_id__in=duplicate_ids
+        ):
+            if item.recipe_id in kept:
+                kept_item = kept[item.recipe_id]
+                kept_item.amount = min(
+                    kept_item.amount + item.amount, settings.MAX_LIMIT
+                )
+                kept_item.save(update_fields=['amount'])
+                item.delete()
+            else:
+                item.ingredient_id = keep_id
+                item.save(update_fields=['ingredient'])
+                kept[item.recipe_id] = item
+        Ingredient.objects.filter(id__in=duplicate_ids).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('recipes', '0004_ingredient_name_trgm'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+    ]
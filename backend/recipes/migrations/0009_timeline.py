@@ -0,0 +1,70 @@
+# Generated by Django 4.2.16 on 2026-10-18 18:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0008_recipe_cart_count_recipe_favorites_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Timeline',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'pub_date',
+                    models.DateTimeField(
+                        verbose_name='Дата публикации рецепта'
+                    ),
+                ),
+                (
+                    'recipe',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='timeline_entries',
+                        to='recipes.recipe',
+                        verbose_name='Рецепт в ленте',
+                    ),
+                ),
+                (
+                    'user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='timeline',
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name='Читатель ленты',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Ленты подписок',
+                'ordering': ['-pub_date'],
+                'indexes': [
+                    models.Index(
+                        fields=['user', '-pub_date'],
+                        name='timeline_user_pub_date_idx',
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='timeline',
+            constraint=models.UniqueConstraint(
+                fields=('user', 'recipe'), name='unique_timeline'
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.16 on 2026-10-18 18:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('recipes', '0009_timeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_renditions',
+            field=models.JSONField(
+                default=dict,
+                editable=False,
+                verbose_name='Уменьшенные копии фотографии',
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.16 on 2026-10-18 18:18
+
+from django.db import migrations, models
+
+import recipes.storage
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('recipes', '0010_recipe_image_renditions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(
+                blank=True,
+                default=None,
+                null=True,
+                storage=recipes.storage.ContentHashStorage(),
+                upload_to='recipes/images/',
+                verbose_name='Фотография готового блюда',
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.16 on 2026-10-18 18:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_not_fanned_out(apps, schema_editor):
+    """Отмечает рецепты авторов, которые не рассылались по лентам."""
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Recipe.objects.filter(
+        author__followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS
+    ).update(fanned_out=False)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('users', '0003_user_followers_count_user_recipes_count'),
+        ('recipes', '0011_recipe_image_content_hash_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='fanned_out',
+            field=models.BooleanField(
+                default=True,
+                editable=False,
+                verbose_name='Разослан по лентам подписчиков',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(
+                condition=models.Q(('fanned_out', False)),
+                fields=['author', '-pub_date', '-id'],
+                name='recipe_not_fanned_out_idx',
+            ),
+        ),
+        migrations.RunPython(mark_not_fanned_out, migrations.RunPython.noop),
+    ]
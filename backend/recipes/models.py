@@ -1,8 +1,11 @@
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.core import validators
 from django.db import models
+from django.db.models.functions import Upper
 
-from users.models import User
+from recipes.storage import ContentHashStorage
+from users.models import ProtectedFieldsMixin, User
 
 
 class Tag(models.Model):
@@ -43,12 +46,23 @@ class Ingredient(models.Model):
         ordering = ['name']
         verbose_name = 'Ингридиент'
         verbose_name_plural = 'Ингридиенты'
+        indexes = [
+            GinIndex(
+                OpClass(Upper('name'), name='gin_trgm_ops'),
+                name='ingredient_name_trgm',
+            )
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'], name='unique_ingredient'
+            )
+        ]
 
     def __str__(self):
         return f'{self.name}, {self.measurement_unit}'
 
 
-class Recipe(models.Model):
+class Recipe(ProtectedFieldsMixin, models.Model):
     tags = models.ManyToManyField(Tag, verbose_name='Тег рецепта')
     author = models.ForeignKey(
         User,
@@ -58,6 +72,7 @@ class Recipe(models.Model):
     )
     image = models.ImageField(
         upload_to='recipes/images/',
+        storage=ContentHashStorage(),
         null=True,
         blank=True,
         default=None,
@@ -92,15 +107,53 @@ class Recipe(models.Model):
         null=True,
         blank=True,
     )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='В избранном', default=0, editable=False
+    )
+    cart_count = models.PositiveIntegerField(
+        verbose_name='В корзинах', default=0, editable=False
+    )
+    image_renditions = models.JSONField(
+        verbose_name='Уменьшенные копии фотографии',
+        default=dict,
+        editable=False,
+    )
+    fanned_out = models.BooleanField(
+        verbose_name='Разослан по лентам подписчиков',
+        default=True,
+        editable=False,
+    )
+
+    protected_fields = (
+        'favorites_count',
+        'cart_count',
+        'image_renditions',
+        'fanned_out',
+    )
 
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                condition=models.Q(fanned_out=False),
+                name='recipe_not_fanned_out_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def has_renditions(self):
+        """Готовы ли уменьшенные копии текущей фотографии."""
+        return self.image_renditions.get('source') == self.image.name
+
 
 class RecipeIngredient(models.Model):
     recipe = models.ForeignKey(
@@ -198,3 +251,37 @@ class Favorites(models.Model):
 
     def __str__(self):
         return f'{self.user.username} - {self.recipe.name}'
+
+
+class Timeline(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель ленты',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Рецепт в ленте',
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации рецепта')
+
+    class Meta:
+        ordering = ['-pub_date']
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Ленты подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'], name='unique_timeline'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date'], name='timeline_user_pub_date_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user.username} - {self.recipe.name}'
@@ -0,0 +1,216 @@
+import zlib
+
+from reportlab.pdfbase.ttfonts import (
+    FF_NONSYMBOLIC,
+    FF_SYMBOLIC,
+    SUBSETN,
+    makeToUnicodeCMap,
+)
+
+CATALOG = 1
+PAGES = 2
+RESOURCES = 3
+
+
+def number(value):
+    """Число в записи PDF: без экспоненты и лишних нулей."""
+    return ('%.3f' % value).rstrip('0').rstrip('.').encode()
+
+
+class PDFWriter:
+    """Минимальный PDF-документ, который выдается по мере заполнения.
+
+    Каждая страница записывается сразу после того, как набраны ее строки;
+    в памяти остаются только смещения объектов для таблицы xref и номера
+    страниц. Каталог, дерево страниц, ресурсы и шрифты имеют заранее
+    известные номера и записываются в конце документа. Шрифт TrueType
+    встраивается подмножествами только с использованными символами, без
+    шрифта текст выводится стандартным Helvetica.
+    """
+
+    def __init__(self, width, height, font=None, font_size=12):
+        self.width = width
+        self.height = height
+        self.font = font
+        self.font_size = font_size
+        self.offset = 0
+        self.offsets = {}
+        self.pages = []
+        self.next_number = RESOURCES + 1
+
+    def allocate(self):
+        self.next_number += 1
+        return self.next_number - 1
+
+    def write(self, data):
+        self.offset += len(data)
+        return data
+
+    def write_object(self, object_number, body):
+        self.offsets[object_number] = self.offset
+        return self.write(b'%d 0 obj\n%s\nendobj\n' % (object_number, body))
+
+    def write_stream(self, object_number, content, dictionary=b''):
+        compressed = zlib.compress(content)
+        return self.write_object(
+            object_number,
+            b'<< /Length %d /Filter /FlateDecode %s>>\nstream\n%s\nendstream'
+            % (len(compressed), dictionary, compressed),
+        )
+
+    def start(self):
+        return self.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def show_text(self, text):
+        """Операторы вывода строки текущим шрифтом."""
+        if self.font is None:
+            parts = [(0, text.encode('cp1252', 'replace'))]
+        else:
+            parts = self.font.splitString(text, self)
+        return b''.join(
+            b'/F%d %s Tf <%s> Tj\n'
+            % (subset, number(self.font_size), part.hex().encode())
+            for subset, part in parts
+        )
+
+    def add_page(self, lines, x, y, line_height):
+        """Записывает страницу со строками, начиная с точки (x, y)."""
+        content = [b'BT\n']
+        for line in lines:
+            content.append(b'1 0 0 1 %s %s Tm\n' % (number(x), number(y)))
+            content.append(self.show_text(line))
+            y -= line_height
+        content.append(b'ET')
+        contents = self.allocate()
+        page = self.allocate()
+        self.pages.append(page)
+        return self.write_stream(contents, b''.join(content)) + (
+            self.write_object(
+                page,
+                b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %s %s] '
+                b'/Resources %d 0 R /Contents %d 0 R >>'
+                % (
+                    PAGES,
+                    number(self.width),
+                    number(self.height),
+                    RESOURCES,
+                    contents,
+                ),
+            )
+        )
+
+    def write_fonts(self):
+        """Объекты шрифтов; возвращает данные и ссылки для ресурсов."""
+        if self.font is None:
+            font = self.allocate()
+            return self.write_object(
+                font,
+                b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica '
+                b'/Encoding /WinAnsiEncoding >>',
+            ), [font]
+        state = self.font.state.get(self)
+        subsets = state.subsets if state is not None else []
+        face = self.font.face
+        data = []
+        fonts = []
+        for index, subset in enumerate(subsets):
+            name = SUBSETN(index) + b'+' + face.name + face.subfontNameX
+            font_file = self.allocate()
+            subset_font = face.makeSubset(subset)
+            data.append(
+                self.write_stream(
+                    font_file,
+                    subset_font,
+                    b'/Length1 %d ' % len(subset_font),
+                )
+            )
+            descriptor = self.allocate()
+            data.append(
+                self.write_object(
+                    descriptor,
+                    b'<< /Type /FontDescriptor /FontName /%s /Flags %d '
+                    b'/FontBBox [%s] /ItalicAngle %s /Ascent %s '
+                    b'/Descent %s /CapHeight %s /StemV %s '
+                    b'/MissingWidth %s /FontFile2 %d 0 R >>'
+                    % (
+                        name,
+                        (face.flags & ~FF_NONSYMBOLIC) | FF_SYMBOLIC,
+                        b' '.join(number(item) for item in face.bbox),
+                        number(face.italicAngle),
+                        number(face.ascent),
+                        number(face.descent),
+                        number(face.capHeight),
+                        number(face.stemV),
+                        number(face.defaultWidth),
+                        font_file,
+                    ),
+                )
+            )
+            to_unicode = self.allocate()
+            data.append(
+                self.write_stream(
+                    to_unicode,
+                    makeToUnicodeCMap(name.decode(), subset).encode(),
+                )
+            )
+            font = self.allocate()
+            widths = b' '.join(
+                number(face.getCharWidth(code)) for code in subset
+            )
+            data.append(
+                self.write_object(
+                    font,
+                    b'<< /Type /Font /Subtype /TrueType /BaseFont /%s '
+                    b'/FirstChar 0 /LastChar %d /Widths [%s] '
+                    b'/FontDescriptor %d 0 R /ToUnicode %d 0 R >>'
+                    % (name, len(subset) - 1, widths, descriptor, to_unicode),
+                )
+            )
+            fonts.append(font)
+        return b''.join(data), fonts
+
+    def finish(self):
+        """Шрифты, ресурсы, дерево страниц, каталог и таблица xref."""
+        fonts_data, fonts = self.write_fonts()
+        data = [fonts_data]
+        data.append(
+            self.write_object(
+                RESOURCES,
+                b'<< /Font << %s >> >>'
+                % b' '.join(
+                    b'/F%d %d 0 R' % (index, font)
+                    for index, font in enumerate(fonts)
+                ),
+            )
+        )
+        data.append(
+            self.write_object(
+                PAGES,
+                b'<< /Type /Pages /Kids [%s] /Count %d >>'
+                % (
+                    b' '.join(b'%d 0 R' % page for page in self.pages),
+                    len(self.pages),
+                ),
+            )
+        )
+        data.append(
+            self.write_object(
+                CATALOG, b'<< /Type /Catalog /Pages %d 0 R >>' % PAGES
+            )
+        )
+        xref = self.offset
+        data.append(b'xref\n0 %d\n0000000000 65535 f \n' % self.next_number)
+        data.extend(
+            b'%010d 00000 n \n' % self.offsets[object_number]
+            for object_number in range(1, self.next_number)
+        )
+        data.append(
+            b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+            % (self.next_number, CATALOG, xref)
+        )
+        return b''.join(data)
+
+    def close(self):
+        """Освобождает состояние подмножеств шрифта для этого документа."""
+        if self.font is not None:
+            self.font.state.pop(self, None)
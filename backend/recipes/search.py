@@ -0,0 +1,115 @@
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+
+from recipes.models import Ingredient
+
+
+class IngredientIndex:
+    """Индекс ингредиентов в памяти процесса для автодополнения.
+
+    Хранит отсортированный список пар (название в casefold, id): поиск по
+    началу названия выполняется бинарным поиском, совпадения в середине
+    названия ищутся полным проходом по списку. Индекс строится при первом
+    запросе, обновляется сигналами модели Ingredient и перестраивается
+    целиком раз в INGREDIENT_INDEX_TTL секунд, чтобы подхватить изменения,
+    сделанные в других процессах. Перестраивает индекс один поток, а
+    остальные тем временем ищут по прежней версии.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._state = None
+        self._built_at = 0
+
+    def build(self):
+        ingredients = {
+            ingredient.id: ingredient
+            for ingredient in Ingredient.objects.only(
+                'id', 'name', 'measurement_unit'
+            ).iterator()
+        }
+        keys = sorted(
+            (ingredient.name.casefold(), ingredient.id)
+            for ingredient in ingredients.values()
+        )
+        with self._lock:
+            self._state = (keys, ingredients)
+            self._built_at = time.monotonic()
+
+    def is_stale(self):
+        return (
+            self._state is None
+            or time.monotonic() - self._built_at
+            > settings.INGREDIENT_INDEX_TTL
+        )
+
+    def add(self, ingredient):
+        with self._lock:
+            if self._state is None:
+                return
+            keys, ingredients = self._state
+            keys = [key for key in keys if key[1] != ingredient.id]
+            insort(keys, (ingredient.name.casefold(), ingredient.id))
+            ingredients = dict(ingredients)
+            ingredients[ingredient.id] = Ingredient(
+                id=ingredient.id,
+                name=ingredient.name,
+                measurement_unit=ingredient.measurement_unit,
+            )
+            self._state = (keys, ingredients)
+
+    def remove(self, ingredient_id):
+        with self._lock:
+            if self._state is None:
+                return
+            keys, ingredients = self._state
+            ingredients = dict(ingredients)
+            ingredients.pop(ingredient_id, None)
+            self._state = (
+                [key for key in keys if key[1] != ingredient_id],
+                ingredients,
+            )
+
+    def refresh(self):
+        """Перестраивает устаревший индекс.
+
+        Пока индекса еще нет, потоки ждут первого построения, а затем только
+        один поток перестраивает его по истечении срока.
+        """
+        if not self.is_stale():
+            return
+        if not self._build_lock.acquire(blocking=self._state is None):
+            return
+        try:
+            if self.is_stale():
+                self.build()
+        finally:
+            self._build_lock.release()
+
+    def search(self, name, limit):
+        self.refresh()
+        keys, ingredients = self._state
+        name = name.casefold()
+        found = []
+        index = bisect_left(keys, (name,))
+        while (
+            index < len(keys)
+            and len(found) < limit
+            and keys[index][0].startswith(name)
+        ):
+            found.append(keys[index][1])
+            index += 1
+        if len(found) < limit:
+            for key, ingredient_id in keys:
+                if name in key and not key.startswith(name):
+                    found.append(ingredient_id)
+                    if len(found) >= limit:
+                        break
+        return [ingredients[ingredient_id] for ingredient_id in found]
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1,67 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.models import Favorites, Ingredient, Recipe, Shopping_cart
+from recipes.search import ingredient_index
+from recipes.timeline import backfill_timeline, clear_timeline, fan_out_recipe
+from users.models import Subscriptions
+
+COUNTERS = {
+    Favorites: ('recipe', 'favorites_count'),
+    Shopping_cart: ('recipe', 'cart_count'),
+    Recipe: ('author', 'recipes_count'),
+    Subscriptions: ('author', 'followers_count'),
+}
+
+
+def change_counter(instance, delta):
+    field, counter = COUNTERS[type(instance)]
+    instance._meta.get_field(field).related_model.objects.filter(
+        pk=getattr(instance, f'{field}_id')
+    ).update(**{counter: Greatest(F(counter) + delta, 0)})
+
+
+@receiver(post_save, sender=Ingredient)
+def update_ingredient_index(sender, instance, **kwargs):
+    ingredient_index.add(instance)
+
+
+@receiver(post_delete, sender=Ingredient)
+def remove_from_ingredient_index(sender, instance, **kwargs):
+    ingredient_index.remove(instance.id)
+
+
+@receiver(post_save, sender=Favorites)
+@receiver(post_save, sender=Shopping_cart)
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Subscriptions)
+def increase_counter(sender, instance, created, **kwargs):
+    if created:
+        change_counter(instance, 1)
+
+
+@receiver(post_delete, sender=Favorites)
+@receiver(post_delete, sender=Shopping_cart)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Subscriptions)
+def decrease_counter(sender, instance, **kwargs):
+    change_counter(instance, -1)
+
+
+@receiver(post_save, sender=Recipe)
+def add_to_timelines(sender, instance, created, **kwargs):
+    if created:
+        fan_out_recipe(instance)
+
+
+@receiver(post_save, sender=Subscriptions)
+def fill_timeline(sender, instance, created, **kwargs):
+    if created:
+        backfill_timeline(instance.user, instance.author)
+
+
+@receiver(post_delete, sender=Subscriptions)
+def empty_timeline(sender, instance, **kwargs):
+    clear_timeline(instance.user_id, instance.author_id)
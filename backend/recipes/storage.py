@@ -0,0 +1,36 @@
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentHashStorage(FileSystemStorage):
+    """Хранилище, называющее файлы по sha256 их содержимого.
+
+    Одинаковые файлы сохраняются один раз, а содержимое по каждому адресу
+    никогда не меняется, поэтому такие файлы можно кешировать навсегда.
+    Файлы могут быть общими для нескольких рецептов, поэтому удаляются
+    они только командой clean_media.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        sha256 = hashlib.sha256()
+        for chunk in content.chunks():
+            sha256.update(chunk)
+        digest = sha256.hexdigest()
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        name = os.path.join(directory, digest[:2], digest + extension)
+        if self.exists(name):
+            # Обновляем время изменения, чтобы clean_media не удалил
+            # файл, который снова начал использоваться.
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length)
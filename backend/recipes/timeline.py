@@ -0,0 +1,127 @@
+from django.conf import settings
+from django.db.models import Count, Q
+
+from recipes.models import Recipe, Timeline
+from users.models import Subscriptions, User
+
+
+def is_fanned_out(author_id):
+    """Рассылать ли новый рецепт автора по лентам подписчиков.
+
+    Рецепты авторов с очень большим числом подписчиков не копируются в
+    ленты, а подмешиваются в ленту при чтении. Число подписчиков читается
+    из базы, а не из объекта в памяти, который мог устареть.
+    """
+    followers_count = (
+        User.objects.filter(pk=author_id)
+        .values_list('followers_count', flat=True)
+        .first()
+    )
+    return (
+        followers_count is not None
+        and followers_count <= settings.FEED_FANOUT_MAX_FOLLOWERS
+    )
+
+
+def fan_out_recipe(recipe):
+    """Добавляет новый рецепт в ленты всех подписчиков автора.
+
+    Решение запоминается в рецепте: неразосланные рецепты подмешиваются
+    в ленту при чтении, даже если позже подписчиков станет меньше.
+    """
+    if not is_fanned_out(recipe.author_id):
+        recipe.fanned_out = False
+        Recipe.objects.filter(pk=recipe.pk).update(fanned_out=False)
+        return
+    Timeline.objects.bulk_create(
+        [
+            Timeline(user_id=user_id, recipe=recipe, pub_date=recipe.pub_date)
+            for user_id in Subscriptions.objects.filter(
+                author_id=recipe.author_id
+            ).values_list('user_id', flat=True)
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def backfill_timeline(user, author):
+    """Заполняет ленту последними разосланными рецептами автора."""
+    Timeline.objects.bulk_create(
+        [
+            Timeline(user=user, recipe_id=recipe_id, pub_date=pub_date)
+            for recipe_id, pub_date in Recipe.objects.filter(
+                author=author, fanned_out=True
+            )
+            .order_by('-pub_date', '-id')
+            .values_list('id', 'pub_date')[: settings.FEED_BACKFILL_SIZE]
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def clear_timeline(user, author):
+    """Убирает рецепты автора из ленты после отписки."""
+    Timeline.objects.filter(user=user, recipe__author=author).delete()
+
+
+def older_than(position, recipe_field):
+    """Условие для записей, идущих в ленте после позиции (pub_date, id)."""
+    pub_date, recipe_id = position
+    return Q(pub_date__lt=pub_date) | Q(
+        pub_date=pub_date, **{f'{recipe_field}__lt': recipe_id}
+    )
+
+
+def get_feed(user_id, limit, position=None):
+    """Страница ленты: до limit пар (pub_date, id рецепта), новые первыми.
+
+    Записи читаются по индексу ленты (user, -pub_date) начиная с позиции
+    position. Рецепты авторов из подписок, которые не рассылались по
+    лентам, выбираются отдельным запросом с тем же ограничением.
+    """
+    timeline = Timeline.objects.filter(user_id=user_id)
+    not_fanned_out = Recipe.objects.filter(
+        author__in=Subscriptions.objects.filter(user_id=user_id).values(
+            'author'
+        ),
+        fanned_out=False,
+        pub_date__isnull=False,
+    )
+    if position is not None:
+        timeline = timeline.filter(older_than(position, 'recipe_id'))
+        not_fanned_out = not_fanned_out.filter(older_than(position, 'id'))
+    timeline = timeline.order_by('-pub_date', '-recipe_id')
+    not_fanned_out = not_fanned_out.order_by('-pub_date', '-id')
+    entries = set(timeline.values_list('pub_date', 'recipe_id')[:limit])
+    entries.update(not_fanned_out.values_list('pub_date', 'id')[:limit])
+    return sorted(entries, reverse=True)[:limit]
+
+
+def trim_timeline(user_id, size):
+    """Оставляет в ленте пользователя только size последних записей."""
+    entries = (
+        Timeline.objects.filter(user_id=user_id)
+        .order_by('-pub_date', '-recipe_id')
+        .values_list('pub_date', 'recipe_id')
+    )
+    try:
+        last = entries[size - 1]
+    except IndexError:
+        return 0
+    deleted, _ = Timeline.objects.filter(
+        older_than(last, 'recipe_id'), user_id=user_id
+    ).delete()
+    return deleted
+
+
+def trim_timelines(size):
+    """Обрезает все ленты длиннее size записей."""
+    return sum(
+        trim_timeline(user_id, size)
+        for user_id in list(
+            Timeline.objects.values('user')
+            .annotate(total=Count('pk'))
+            .filter(total__gt=size)
+            .values_list('user', flat=True)
+        )
+    )
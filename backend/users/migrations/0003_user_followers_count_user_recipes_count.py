@@ -0,0 +1,52 @@
+# Generated by Django 4.2.16 on 2026-10-18 18:12
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_related(model, field):
+    return Coalesce(
+        models.Subquery(
+            model.objects.filter(**{field: models.OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=models.Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def fill_counters(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Subscriptions = apps.get_model('users', 'Subscriptions')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    User.objects.update(
+        recipes_count=count_related(Recipe, 'author'),
+        followers_count=count_related(Subscriptions, 'author'),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('recipes', '0008_recipe_cart_count_recipe_favorites_count'),
+        ('users', '0002_auto_20230811_2302'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name='количество подписчиков'
+            ),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='recipes_count',
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name='количество рецептов'
+            ),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
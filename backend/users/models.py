@@ -3,7 +3,31 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 
 
-class User(AbstractUser):
+class ProtectedFieldsMixin:
+    """Не перезаписывает отдельно обновляемые поля при обычном сохранении.
+
+    Поля из protected_fields, например счетчики или результат фоновой
+    обработки, меняются только точечными запросами. Сохранение
+    существующего объекта без update_fields обновляет остальные поля,
+    чтобы устаревшая копия в памяти не затерла их значения в базе.
+    """
+
+    protected_fields = ()
+
+    def save(self, *args, update_fields=None, **kwargs):
+        if update_fields is None and not self._state.adding:
+            deferred = self.get_deferred_fields()
+            update_fields = [
+                field.attname
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name not in self.protected_fields
+            ]
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+
+class User(ProtectedFieldsMixin, AbstractUser):
     email = models.EmailField(max_length=settings.LEN_EMAIL, unique=True)
     username = models.CharField(max_length=settings.LEN_STRING, unique=True)
     first_name = models.CharField(
@@ -12,6 +36,14 @@ class User(AbstractUser):
     last_name = models.CharField(
         'фамилия', max_length=settings.LEN_STRING, blank=True
     )
+    recipes_count = models.PositiveIntegerField(
+        'количество рецептов', default=0, editable=False
+    )
+    followers_count = models.PositiveIntegerField(
+        'количество подписчиков', default=0, editable=False
+    )
+
+    protected_fields = ('recipes_count', 'followers_count')
 
     class Meta:
         ordering = ['id']